@@ -2,6 +2,12 @@
 #  AVIATION ACCIDENTS ANALYSIS
 # ===========================
 
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -16,10 +22,11 @@ import pycountry
 def load_data(file_path):
     """
     Load the aviation accidents Excel file
+    (uses the Rust-based calamine parser, much faster than openpyxl)
     """
     print(f" Loading data from: {file_path}")
 
-    df = pd.read_excel(file_path)
+    df = pd.read_excel(file_path, engine="calamine")
 
     print(f" Loaded {len(df)} rows and {len(df.columns)} columns")
     return df
@@ -45,8 +52,18 @@ def clean_data(df):
         "fatilites": "fatalities"
     })
 
-    # Remove duplicate rows
-    df = df.drop_duplicates()
+    # Remove duplicate accidents:
+    # - with a registration, the same aircraft on the same date, operator and country
+    #   is one accident (even if e.g. the location is spelled differently)
+    # - without one, rows must match on every column (several unregistered
+    #   aircraft of one operator can crash on the same day)
+    has_registration = df['registration'].notna()
+    registered = df[has_registration].drop_duplicates(subset=['date', 'registration', 'operator', 'country'])
+    unregistered = df[~has_registration].drop_duplicates()
+    df = pd.concat([registered, unregistered]).sort_index()
+
+    # Keep only the columns the analysis uses
+    df = df[['country', 'date', 'aircraft_type', 'registration', 'operator', 'fatalities', 'category']].copy()
 
     # Fill missing values with 'Unknown'
     df['aircraft_type'] = df['aircraft_type'].fillna('Unknown')
@@ -54,18 +71,31 @@ def clean_data(df):
     df['country'] = df['country'].fillna("Unknown")
     df['category'] = df['category'].fillna("Unknown")
 
-    # Convert fatalities to numbers (replace errors with 0)
-    df['fatalities'] = pd.to_numeric(df['fatalities'], errors='coerce').fillna(0)
+    # Registration marks mix numbers and text: store them all as text
+    df['registration'] = df['registration'].astype('string')
+
+    # Convert fatalities to whole numbers (replace errors with 0)
+    df['fatalities'] = pd.to_numeric(df['fatalities'], errors='coerce').fillna(0).astype(np.int32)
 
-    # Convert date column and extract year
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df['year'] = df['date'].dt.year
+    # Convert date column (e.g. '07-Dec-2016') and extract year
+    df['date'] = pd.to_datetime(df['date'], errors='coerce', format='%d-%b-%Y')
+    df['year'] = df['date'].dt.year.astype('Int16')
 
     # Clean country names (remove extra spaces, make proper case)
-    df['country'] = df['country'].str.strip().str.title()
+    # Each distinct name is cleaned once, then mapped onto all rows
+    country_names = {name: name.strip().title() for name in df['country'].unique()}
+    df['country'] = df['country'].map(country_names)
 
     # Create damage type: 'Hull Loss' if fatalities > 0, else 'Repairable'
-    df['damage_type'] = df['fatalities'].apply(lambda x: 'Hull Loss' if x > 0 else 'Repairable')
+    # (built straight from codes: 0 = Hull Loss, 1 = Repairable)
+    df['damage_type'] = pd.Categorical.from_codes(
+        (df['fatalities'].to_numpy() <= 0).astype(np.int8),
+        categories=['Hull Loss', 'Repairable']
+    )
+
+    # Store repeated text columns as categories (small integer codes, faster groupby)
+    for col in ['country', 'operator', 'aircraft_type', 'category']:
+        df[col] = df[col].astype('category')
 
     print(f"✅ Data cleaned! Final dataset has {len(df)} rows")
     print(f" Date range: {df['year'].min()} to {df['year'].max()}")
@@ -73,65 +103,222 @@ def clean_data(df):
     return df
 
 
+# ============================================
+# CACHE: REUSE CLEANED DATA BETWEEN RUNS
+# ============================================
+
+# Bump this whenever clean_data changes, so old caches are rebuilt
+CACHE_VERSION = 3
+
+
+def get_cache_paths(file_path):
+    """
+    Cache files live next to the source file:
+    'data.xlsx' -> 'data.clean.parquet' + 'data.clean.json'
+    """
+    source = Path(file_path)
+    return source.with_suffix('.clean.parquet'), source.with_suffix('.clean.json')
+
+
+def get_source_signature(file_path):
+    """
+    Identify the source file version by its modification time and size
+    """
+    return {
+        'version': CACHE_VERSION,
+        'mtime': os.path.getmtime(file_path),
+        'size': os.path.getsize(file_path)
+    }
+
+
+def load_cached_data(file_path):
+    """
+    Return the cleaned DataFrame from the cache, or None if it is missing or stale
+    """
+    cache_path, signature_path = get_cache_paths(file_path)
+    if not cache_path.exists() or not signature_path.exists():
+        return None
+
+    with open(signature_path) as f:
+        if json.load(f) != get_source_signature(file_path):
+            return None
+
+    print(f" Loading cleaned data from cache: {cache_path}")
+    df = pd.read_parquet(cache_path)
+    print(f" Loaded {len(df)} rows")
+    return df
+
+
+def save_cached_data(df, file_path):
+    """
+    Save the cleaned DataFrame and the source signature it was built from
+    """
+    cache_path, signature_path = get_cache_paths(file_path)
+    df.to_parquet(cache_path)
+    with open(signature_path, 'w') as f:
+        json.dump(get_source_signature(file_path), f)
+    print(f" Cleaned data cached to: {cache_path}")
+
+
 # ============================================
 # HELPER: CONVERT COUNTRY NAME TO CODE
 # ============================================
 
+def build_country_codes():
+    """
+    Build a lookup of every pycountry name and code (lowercase) -> 3-letter code
+    Matches the same fields as pycountry.countries.lookup, but only once
+    """
+    codes = {}
+    for country in pycountry.countries:
+        for field in ['alpha_2', 'alpha_3', 'numeric', 'name', 'official_name', 'common_name']:
+            value = getattr(country, field, None)
+            if value:
+                codes.setdefault(value.lower(), country.alpha_3)
+    return codes
+
+
+COUNTRY_CODES = build_country_codes()
+
+
 def get_country_code(country_name):
     """
     Convert country name to 3-letter code (for maps)
     Example: 'United States' -> 'USA'
     """
-    try:
-        return pycountry.countries.lookup(country_name).alpha_3
-    except:
-        return None
+    return COUNTRY_CODES.get(str(country_name).strip().lower())
+
+
+# ============================================
+# HELPER: FAST COUNTS ON CATEGORY CODES
+# ============================================
+
+def count_categories(series):
+    """
+    Count rows per value of a categorical column, largest first
+    (same result as value_counts, but counts the integer codes with np.bincount)
+    """
+    categories = series.cat.categories
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    return pd.Series(counts[order], index=categories[order].rename(series.name), name='count')
+
+
+def aggregate_by(df, key):
+    """
+    Accidents and total fatalities per value of a categorical `key` (e.g. 'operator')
+    Both are dense histograms over the category codes
+    """
+    categories = df[key].cat.categories
+    codes = df[key].cat.codes.to_numpy()
+    valid = codes >= 0
+
+    accidents = np.bincount(codes[valid], minlength=len(categories))
+    # Weighted bincount always returns floats; fatalities are whole numbers
+    fatalities = np.bincount(codes[valid], weights=df['fatalities'].to_numpy()[valid],
+                             minlength=len(categories)).round().astype(np.int64)
+
+    stats = pd.DataFrame({'accidents': accidents, 'fatalities': fatalities},
+                         index=categories.rename(key))
+    return stats[stats['accidents'] > 0]
+
+
+def count_pairs(df, row_key, column_key):
+    """
+    Count rows per (row_key, column_key) pair of two categorical columns
+    Returns a table with one row per `row_key` category and one column per `column_key` category
+    """
+    rows = df[row_key].cat.categories
+    columns = df[column_key].cat.categories
+    row_codes = df[row_key].cat.codes.to_numpy(np.intp)
+    column_codes = df[column_key].cat.codes.to_numpy(np.intp)
+    valid = (row_codes >= 0) & (column_codes >= 0)
+
+    # Fuse both codes into one index and count them in a single pass
+    pair_codes = row_codes[valid] * len(columns) + column_codes[valid]
+    counts = np.bincount(pair_codes, minlength=len(rows) * len(columns))
+    return pd.DataFrame(counts.reshape(len(rows), len(columns)),
+                        index=rows.rename(row_key), columns=columns.rename(column_key))
+
+
+# ============================================
+# HELPER: SUMMARY STATISTICS (COMPUTED ONCE)
+# ============================================
+
+@dataclass
+class Stats:
+    """
+    Summary numbers shared by the charts and insights
+    """
+    total_accidents: int
+    country_counts: pd.Series   # accidents per country, largest first
+    operator_agg: pd.DataFrame  # accidents + fatalities per operator
+    aircraft_agg: pd.DataFrame  # accidents + fatalities per aircraft type
+
+
+def build_stats(df):
+    """
+    Compute all summary statistics from the cleaned data in one place
+    """
+    return Stats(
+        total_accidents=len(df),
+        country_counts=count_categories(df['country']),
+        operator_agg=aggregate_by(df, 'operator'),
+        aircraft_agg=aggregate_by(df, 'aircraft_type')
+    )
 
 
 # ============================================
 # STEP 3: CREATE VISUALIZATIONS
 # ============================================
 
-def create_top_countries_chart(df):
+def create_top_countries_chart(stats, ax=None):
     """
     Chart 1: Bar chart showing countries with most accidents
+    Draws on `ax` if given, otherwise in its own figure
     """
     print("\n Creating Top Countries chart...")
 
     # Get top 15 countries
-    top15 = df['country'].value_counts().head(15)
+    top15 = stats.country_counts.head(15)
 
     # Create the chart
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x=top15.values, y=top15.index, palette='Reds_r')
-    plt.title('Top 15 Countries by Aviation Accidents', fontsize=14, fontweight='bold')
-    plt.xlabel('Number of Accidents')
-    plt.ylabel('Country')
+    standalone = ax is None
+    if standalone:
+        fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=top15.values, y=top15.index.astype(str), palette='Reds_r', ax=ax)
+    ax.set_title('Top 15 Countries by Aviation Accidents', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Accidents')
+    ax.set_ylabel('Country')
 
     # Add numbers on bars
     for i, v in enumerate(top15.values):
-        plt.text(v + 5, i, str(v), color='black', va='center', fontweight='bold')
+        ax.text(v + 5, i, str(v), color='black', va='center', fontweight='bold')
 
-    plt.tight_layout()
-    plt.show()
+    if standalone:
+        fig.tight_layout()
+        plt.show()
 
     # Print percentage share
-    percentage = (top15.sum() / len(df)) * 100
+    percentage = (top15.sum() / stats.total_accidents) * 100
     print(f" Top 15 countries = {percentage:.1f}% of all accidents")
 
 
-def create_world_map(df):
+def create_world_map(stats):
     """
     Chart 2: Interactive world map showing accident distribution
     """
     print("\n Creating World Map...")
 
-    # Count accidents per country
-    country_data = df['country'].value_counts().reset_index()
+    # Accidents per country
+    country_data = stats.country_counts.reset_index()
     country_data.columns = ['country', 'accidents']
 
     # Get country codes for mapping
-    country_data['country_code'] = country_data['country'].apply(get_country_code)
+    country_data['country_code'] = country_data['country'].astype(str).map(get_country_code)
     country_data = country_data.dropna(subset=['country_code'])
 
     # Create interactive map
@@ -155,12 +342,13 @@ def create_operator_treemap(df):
     """
     print("\n Creating Operator Treemap...")
 
-    # Group by country and operator
+    # Group by country and operator, skipping operators with a single accident
+    # (thousands of tiny tiles are invisible but make the chart much larger to render)
+    operator_counts = df.groupby(['country', 'operator'], sort=False, observed=True).size()
     operator_data = (
-        df.groupby(['country', 'operator'])
-        .size()
+        operator_counts[operator_counts >= 2]
+        .sort_values(ascending=False)
         .reset_index(name='accident_count')
-        .sort_values(by='accident_count', ascending=False)
     )
 
     # Create treemap
@@ -170,38 +358,38 @@ def create_operator_treemap(df):
         values='accident_count',
         color='accident_count',
         color_continuous_scale='Reds',
-        title='Aviation Accidents by Country and Operator'
+        title='Aviation Accidents by Country and Operator (operators with 2+ accidents)'
     )
     fig.show()
     print(" Treemap created!")
 
 
-def create_category_heatmap(df):
+def create_category_heatmap(df, ax=None):
     """
     Chart 4: Heatmap showing accident categories vs damage type
+    Draws on `ax` if given, otherwise in its own figure
     """
     print("\n Creating Category Heatmap...")
 
-    # Create pivot table
-    pivot = df.pivot_table(
-        index='category',
-        columns='damage_type',
-        aggfunc='size',
-        fill_value=0
-    )
+    # Count accidents per category and damage type
+    pivot = count_pairs(df, 'category', 'damage_type')
 
     # Create heatmap
-    plt.figure(figsize=(10, 6))
-    sns.heatmap(pivot, annot=True, fmt="d", cmap="Reds")
-    plt.title("Accident Categories vs Damage Type", fontsize=14, fontweight='bold')
-    plt.xlabel("Damage Type")
-    plt.ylabel("Accident Category")
-    plt.tight_layout()
-    plt.show()
+    standalone = ax is None
+    if standalone:
+        fig, ax = plt.subplots(figsize=(10, 6))
+    sns.heatmap(pivot, annot=True, fmt="d", cmap="Reds", ax=ax)
+    ax.set_title("Accident Categories vs Damage Type", fontsize=14, fontweight='bold')
+    ax.set_xlabel("Damage Type")
+    ax.set_ylabel("Accident Category")
+
+    if standalone:
+        fig.tight_layout()
+        plt.show()
     print(" Heatmap created!")
 
 
-def create_all_charts(df):
+def create_all_charts(df, stats):
     """
     Master function: Creates all 4 visualizations
     """
@@ -209,10 +397,16 @@ def create_all_charts(df):
     print(" CREATING ALL VISUALIZATIONS")
     print("=" * 60)
 
-    create_top_countries_chart(df)
-    create_world_map(df)
+    # Both Matplotlib charts share one figure, rendered with a single show()
+    fig, axes = plt.subplots(1, 2, figsize=(22, 6))
+
+    create_top_countries_chart(stats, ax=axes[0])
+    create_world_map(stats)
     create_operator_treemap(df)
-    create_category_heatmap(df)
+    create_category_heatmap(df, ax=axes[1])
+
+    fig.tight_layout()
+    plt.show()
 
     print("\n All visualizations completed!")
 
@@ -221,82 +415,94 @@ def create_all_charts(df):
 # STEP 4: GENERATE INSIGHTS
 # ============================================
 
-def print_insight_1(df):
+def print_insight_1(stats):
     """Insight 1: What % of accidents are in top 15 countries?"""
     print("\n INSIGHT 1: Top 15 Countries Share")
-    top15_count = df['country'].value_counts().head(15).sum()
-    percentage = (top15_count / len(df)) * 100
+    top15_count = stats.country_counts.head(15).sum()
+    percentage = (top15_count / stats.total_accidents) * 100
     print(f"   Top 15 countries account for {percentage:.2f}% of all accidents")
 
 
-def print_insight_2(df):
+def print_insight_2(stats):
     """Insight 2: Which countries have the most accidents?"""
     print("\n INSIGHT 2: Top 5 Countries with Most Accidents")
-    print(df['country'].value_counts().head(5))
+    print(stats.country_counts.head(5))
 
 
 def print_insight_3(df):
     """Insight 3: Is there a correlation between year and fatalities?"""
     print("\n INSIGHT 3: Correlation Between Fatalities and Year")
-    corr = df[['fatalities', 'year']].corr()
-    print(corr)
+    fatalities = df['fatalities'].to_numpy(dtype=np.float64)
+    years = df['year'].to_numpy(dtype=np.float64, na_value=np.nan)
 
+    # Only rows with a known year
+    known = ~np.isnan(years)
+    corr = np.corrcoef(fatalities[known], years[known])[0, 1]
+    print(f"   Pearson correlation (fatalities vs year): {corr:.6f}")
 
-def print_insight_4(df):
+
+def print_insight_4(df, stats):
     """Insight 4: What's the biggest accident category per country?"""
     print("\n INSIGHT 4: Largest Accident Category per Top Country")
-    top15_countries = df['country'].value_counts().head(15).index
-    temp = df[df['country'].isin(top15_countries)]
-    segment = temp.groupby(['country', 'category']).size().reset_index(name='count')
-    segment = segment.loc[segment.groupby('country')['count'].idxmax()]
+    top15_countries = stats.country_counts.head(15).index
+
+    # Count every (country, category) pair at once, then keep the top countries
+    pair_counts = count_pairs(df, 'country', 'category').loc[top15_countries]
+
+    # Largest category for each of the top countries
+    segment = pd.DataFrame({
+        'country': top15_countries,
+        'category': pair_counts.idxmax(axis=1).to_numpy(),
+        'count': pair_counts.max(axis=1).to_numpy()
+    })
     print(segment)
 
 
-def print_insight_5(df):
+def print_insight_5(stats):
     """Insight 5: Which country has the most accidents?"""
     print("\n INSIGHT 5: Country with Most Accidents")
-    country = df['country'].value_counts().idxmax()
-    count = df['country'].value_counts().max()
+    # country_counts is sorted largest first, so the top country is the first entry
+    country = stats.country_counts.index[0]
+    count = stats.country_counts.iloc[0]
     print(f"   {country}: {count} accidents")
 
 
-def print_insight_6(df):
+def print_insight_6(stats):
     """Insight 6: What are the most common aircraft types?"""
     print("\n INSIGHT 6: Top 10 Most Common Aircraft Types")
-    print(df['aircraft_type'].value_counts().head(10))
+    print(stats.aircraft_agg['accidents'].nlargest(10).rename('count'))
 
 
-def print_insight_7(df):
+def print_insight_7(stats):
     """Insight 7: Which operators have the highest fatalities?"""
     print("\n INSIGHT 7: Operators with Highest Total Fatalities")
-    operator_fatalities = df.groupby('operator')['fatalities'].sum().sort_values(ascending=False).head(10)
-    print(operator_fatalities)
+    print(stats.operator_agg['fatalities'].nlargest(10))
 
 
-def print_insight_8(df):
+def print_insight_8(stats):
     """Insight 8: Which aircraft types are deadliest per accident?"""
     print("\n INSIGHT 8: Deadliest Aircraft Types (Fatality Rate)")
-    aircraft_stats = df.groupby('aircraft_type').agg(
-        total_accidents=('aircraft_type', 'count'),
-        total_fatalities=('fatalities', 'sum')
-    )
+    aircraft_agg = stats.aircraft_agg
+    aircraft_stats = aircraft_agg.rename(columns={
+        'accidents': 'total_accidents',
+        'fatalities': 'total_fatalities'
+    })
     aircraft_stats['fatality_rate'] = aircraft_stats['total_fatalities'] / aircraft_stats['total_accidents']
-    print(aircraft_stats.sort_values('fatality_rate', ascending=False).head(10))
+    print(aircraft_stats.nlargest(10, 'fatality_rate'))
 
 
-def print_insight_9(df):
+def print_insight_9(stats):
     """Insight 9: Operator safety index (fatalities per 100 accidents)"""
     print("\n INSIGHT 9: Operator Safety Index (min 5 accidents)")
-    operator_stats = df.groupby('operator').agg(
-        accidents=('operator', 'count'),
-        fatalities=('fatalities', 'sum')
+    operator_agg = stats.operator_agg
+    operator_stats = operator_agg[operator_agg['accidents'] >= 5]
+    operator_stats = operator_stats.assign(
+        safety_index=(operator_stats['fatalities'] / operator_stats['accidents']) * 100
     )
-    operator_stats['safety_index'] = (operator_stats['fatalities'] / operator_stats['accidents']) * 100
-    operator_stats = operator_stats[operator_stats['accidents'] >= 5]
-    print(operator_stats.sort_values('safety_index', ascending=False).head(10))
+    print(operator_stats.nlargest(10, 'safety_index'))
 
 
-def print_all_insights(df):
+def print_all_insights(df, stats):
     """
     Master function: Prints all 9 insights
     """
@@ -304,15 +510,15 @@ def print_all_insights(df):
     print("GENERATING ALL INSIGHTS")
     print("=" * 60)
 
-    print_insight_1(df)
-    print_insight_2(df)
+    print_insight_1(stats)
+    print_insight_2(stats)
     print_insight_3(df)
-    print_insight_4(df)
-    print_insight_5(df)
-    print_insight_6(df)
-    print_insight_7(df)
-    print_insight_8(df)
-    print_insight_9(df)
+    print_insight_4(df, stats)
+    print_insight_5(stats)
+    print_insight_6(stats)
+    print_insight_7(stats)
+    print_insight_8(stats)
+    print_insight_9(stats)
 
     print("\n All insights completed!")
 
@@ -336,17 +542,34 @@ def run_etl(file_path):
     print("AVIATION ACCIDENTS ANALYSIS - STARTING...")
     print("=" * 60)
 
-    # Step 1: Load the data
-    df = load_data(file_path)
+    # Step 1 + 2: Reuse the cleaned data if the source file has not changed
+    # (the cache is optional: if it cannot be read, just load and clean again)
+    try:
+        df = load_cached_data(file_path)
+    except (OSError, ImportError, ValueError) as e:
+        print(f" Could not read cache ({e}), loading from source instead")
+        df = None
+
+    if df is None:
+        # Step 1: Load the data
+        df = load_data(file_path)
+
+        # Step 2: Clean the data
+        df = clean_data(df)
+
+        try:
+            save_cached_data(df, file_path)
+        except (OSError, ImportError, ValueError) as e:
+            print(f" Could not write cache ({e}), continuing without it")
 
-    # Step 2: Clean the data
-    df = clean_data(df)
+    # Compute the shared summary statistics once and reuse everywhere
+    stats = build_stats(df)
 
     # Step 3: Create all visualizations
-    create_all_charts(df)
+    create_all_charts(df, stats)
 
     # Step 4: Print all insights
-    print_all_insights(df)
+    print_all_insights(df, stats)
 
     print("\n" + "=" * 60)
     print("ANALYSIS COMPLETED SUCCESSFULLY!")